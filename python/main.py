@@ -1,29 +1,189 @@
+import atexit
+import functools
+import logging
 import os
 import random
+import sys
+import threading
 import time
 import json
 import requests
+from collections.abc import Mapping
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from azure.identity import DefaultAzureCredential, EnvironmentCredential
+from types import MappingProxyType
+from azure.identity import (
+    AzureCliCredential,
+    AzurePowerShellCredential,
+    ChainedTokenCredential,
+    EnvironmentCredential,
+    ManagedIdentityCredential,
+    TokenCachePersistenceOptions,
+    WorkloadIdentityCredential,
+)
 from azure.mgmt.workloadorchestration import WorkloadOrchestrationMgmtClient
-from azure.core.exceptions import HttpResponseError
+from azure.core.exceptions import ClientAuthenticationError, HttpResponseError, ServiceRequestError, ServiceResponseError
+from azure.core.pipeline.transport import RequestsTransport
 
-def retry_operation(operation, max_attempts=3, delay_seconds=30):
+try:
+    import orjson  # Optional; falls back to the standard library encoder
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ResRef:
+    """
+    The part of a created resource that the workflow keeps: its name.
+    main() keeps a ResRef rather than the full SDK model, so the parsed response is freed right away.
+    """
+    # Declared by hand because dataclass(slots=True) needs Python 3.10
+    __slots__ = ("name",)
+    name: str
+
+def _json_dumps(obj):
+    """
+    Serializes obj to compact UTF-8 JSON bytes, using orjson when it is installed.
+    SDK operations send bytes bodies as-is instead of running them through their own encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def _json_loads(data):
+    """
+    Parses JSON from bytes or str, using orjson when it is installed.
+    Both parsers raise json.JSONDecodeError (orjson's error subclasses it) on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# HTTP statuses worth another attempt: timeouts, throttling and server-side faults
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Failures to reach the service at all, from the SDK pipeline or from raw requests calls
+_RETRYABLE_ERRORS = (
+    ServiceRequestError,
+    ServiceResponseError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+def _is_retryable(error):
+    """
+    Tells transient failures apart from ones that will fail the same way on every attempt.
+    Auth, validation and not-found responses are re-raised without retrying, as are token
+    failures, which azure-identity raises as HttpResponseError subclasses without a response.
+    An LRO that reaches a failed provisioning state arrives with its successful final poll
+    response and is retried, since that is how resources referencing a just-updated context
+    usually fail.
+    """
+    if isinstance(error, ClientAuthenticationError):
+        return False
+    if isinstance(error, HttpResponseError):
+        if error.response is None:
+            return False
+        status = error.status_code
+    elif isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    else:
+        return isinstance(error, _RETRYABLE_ERRORS)
+    return status < 400 or status in _RETRYABLE_STATUS_CODES
+
+class RetryBudget:
+    """
+    Token bucket capping how many retries the whole workflow may spend.
+    Every retry takes a token and tokens trickle back at a fixed rate, so a failing
+    dependency can't turn each step's attempts into a cascade of retries against ARM.
+    """
+    def __init__(self, capacity=10, refill_per_second=1 / 60):
+        self._capacity = capacity
+        self._refill_per_second = refill_per_second
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._refill_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+# Shared by every retry_operation call in the process
+_RETRY_BUDGET = RetryBudget()
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling ARM while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Opens after threshold consecutive transient failures and rejects calls for cooldown
+    seconds, so a sustained ARM outage fails each step fast instead of sleeping through
+    its full backoff. After the cooldown calls are let through again; a success closes
+    the circuit, another transient failure reopens it for a further cooldown.
+    """
+    def __init__(self, threshold=5, cooldown=60.0):
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            return self._opened_at is None or time.monotonic() - self._opened_at >= self._cooldown
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self._threshold:
+                self._opened_at = time.monotonic()
+
+# Shared by every retry_operation call in the process
+_CIRCUIT_BREAKER = CircuitBreaker()
+
+def retry_operation(operation, max_attempts=3, base_delay=30.0, max_delay=120.0):
     """
     Utility function to retry operations that might fail due to transient errors.
-    Uses exponential backoff to avoid overwhelming the service.
+    Uses capped exponential backoff with full jitter, so operations failing together
+    don't retry in lockstep. Errors that can't succeed on retry are re-raised at once.
+    Raises CircuitOpenError without calling operation while ARM looks unavailable.
     Used for resource creation operations that may temporarily fail.
     """
     for attempt in range(max_attempts):
+        if not _CIRCUIT_BREAKER.allow():
+            raise CircuitOpenError("Circuit breaker is open after repeated transient failures; not calling ARM")
         try:
-            return operation()
+            result = operation()
         except Exception as e:
-            if attempt == max_attempts - 1:  # Last attempt
-                raise  # Re-raise the last exception
-            print(f"Attempt {attempt + 1} failed: {str(e)}")
-            print(f"Waiting {delay_seconds} seconds before retrying...")
-            time.sleep(delay_seconds)
-            delay_seconds *= 2  # Exponential backoff
+            # Only transient failures say anything about ARM's health
+            if _is_retryable(e):
+                _CIRCUIT_BREAKER.record_failure()
+            if attempt == max_attempts - 1 or not _is_retryable(e):
+                raise  # Re-raise the last or unrecoverable exception
+            if not _RETRY_BUDGET.try_acquire():
+                logger.warning("Attempt %s failed and the retry budget is exhausted: %s", attempt + 1, e)
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            logger.warning("Attempt %s failed: %s", attempt + 1, e)
+            logger.warning("Waiting %.1f seconds before retrying...", delay)
+            time.sleep(delay)
+        else:
+            _CIRCUIT_BREAKER.record_success()
+            return result
 
 # Configuration
 LOCATION = "eastus2euap"
@@ -32,9 +192,49 @@ RESOURCE_GROUP = "sdkexamples"
 CONTEXT_RESOURCE_GROUP = "Mehoopany"  # Hardcoded resource group for context
 CONTEXT_NAME = "Mehoopany-Context"    # Hardcoded context name
 
+# Token scope for Azure Resource Manager, used by the startup probe and the raw REST calls
+ARM_SCOPE = "https://management.azure.com/.default"
+
+# Resource IDs every target points at, formatted once at import
+_EXT_LOC_ID = "/subscriptions/973d15c6-6c57-447e-b9c6-6d79b5b784ab/resourceGroups/configmanager-cloudtest-playground-portal/providers/Microsoft.ExtendedLocation/customLocations/den-Location"
+_CTX_ID = f"/subscriptions/973d15c6-6c57-447e-b9c6-6d79b5b784ab/resourceGroups/{CONTEXT_RESOURCE_GROUP}/providers/Microsoft.Edge/contexts/{CONTEXT_NAME}"
+
 # Single capability configuration - ensures consistency across all resources
 SINGLE_CAPABILITY_NAME = "sdkexamples-soap"
 
+# Configuration values matching the schema, set on the target in step 3
+CONFIG_VALUES = MappingProxyType({
+    "ErrorThreshold": 35.3,
+    "HealthCheckEndpoint": "http://localhost:8080/health",
+    "EnableLocalLog": True,
+    "AgentEndpoint": "http://localhost:8080/agent",
+    "HealthCheckEnabled": True,
+    "ApplicationEndpoint": "http://localhost:8080/app",
+    "TemperatureRangeMax": 100.5
+})
+
+# Seconds between status polls for the long-running create operations. The SDK
+# default of 30 seconds is far longer than these resources take to provision.
+# Schemas and schema versions are plain metadata writes that finish within a
+# second or two, so they are polled faster than the other resources.
+# Publish runs for minutes, but install waits on it, so it is polled every few seconds
+# rather than every 30 to start the install soon after publish finishes. Install is
+# the last step; nothing waits on it, so it keeps the SDK default.
+FAST_LRO_POLLING_INTERVAL = 1
+LRO_POLLING_INTERVAL = 2
+PUBLISH_POLLING_INTERVAL = 5
+
+# Polling options shared by the create operations. A PollingMethod instance
+# can't be shared itself: it holds per-operation state once started, and the
+# step 2 operations poll concurrently.
+_FAST_LRO_OPTIONS = {"polling_interval": FAST_LRO_POLLING_INTERVAL}
+_LRO_OPTIONS = {"polling_interval": LRO_POLLING_INTERVAL}
+_PUBLISH_LRO_OPTIONS = {"polling_interval": PUBLISH_POLLING_INTERVAL}
+
+# Step separators in the console output
+BANNER50 = "=" * 50
+BANNER60 = "=" * 60
+
 # Authentication setup hints
 AUTH_SETUP_HINT = """
 Please set up authentication by either:
@@ -51,40 +251,172 @@ Please set up authentication by either:
    Run: Connect-AzAccount
 """
 
+def _create_session():
+    """
+    Builds the HTTP session shared by every management client and the Configuration API
+    calls, so requests and LRO status polls reuse the same pooled keep-alive connections
+    instead of new handshakes.
+    """
+    session = requests.Session()
+    # Room for concurrent LRO polls to keep their connections; retries are left to the
+    # SDK's RetryPolicy and retry_operation so failed requests aren't retried at two layers
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=50, max_retries=0)
+    session.mount("https://", adapter)
+    return session
+
+_SESSION = _create_session()
+# Clients are built with session_owner=False, so the pooled connections are closed here once
+atexit.register(_SESSION.close)
+
+# Refresh a cached token once it is this close to expiring, in seconds
+_TOKEN_REFRESH_MARGIN = 300
+
+def _token_cache_persistence():
+    """
+    Returns the on-disk token cache options selected by the TOKEN_CACHE environment variable:
+    "memory" (the default) keeps tokens in-process only, "persistent" shares them across runs
+    through the OS-encrypted store (keyring, Keychain or DPAPI) and fails where none exists,
+    and "unencrypted" additionally allows a plaintext file in the user's profile on such hosts.
+    """
+    mode = os.getenv("TOKEN_CACHE", "memory").lower()
+    if mode == "persistent":
+        return TokenCachePersistenceOptions(name="workload-sdk-example")
+    if mode == "unencrypted":
+        return TokenCachePersistenceOptions(name="workload-sdk-example", allow_unencrypted_storage=True)
+    return None
+
+class CachingTokenCredential:
+    """
+    Wraps a credential and hands out its access tokens from memory, per scope, until
+    they are within _TOKEN_REFRESH_MARGIN seconds of expiry. The management client and
+    the Configuration API calls share one wrapper, so after the first request none of
+    them goes back to MSAL, IMDS or the Azure CLI for a token.
+    """
+    def __init__(self, inner):
+        self._inner = inner
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    # Only get_token is exposed, not get_token_info: azure-core's bearer token policy then
+    # asks this method for tokens, so the token fetched by main()'s startup probe is the
+    # one the management client's first request picks up. Flags the policy adds, such
+    # as enable_cae, are passed through on a miss but are not part of the cache key.
+    def get_token(self, *scopes, claims=None, tenant_id=None, **kwargs):
+        # A claims challenge asks for a fresh token, so it always goes to the inner credential
+        if claims:
+            return self._inner.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        key = (scopes, tenant_id)
+        with self._lock:
+            token = self._cache.get(key)
+            if token is None or token.expires_on - time.time() <= _TOKEN_REFRESH_MARGIN:
+                token = self._inner.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+                self._cache[key] = token
+            return token
+
+    def close(self):
+        self._inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+@functools.lru_cache(maxsize=None)
+def get_credential():
+    """
+    Returns the process-wide Azure credential, built once and reused.
+    The environment is inspected once to pick the one credential type that applies,
+    instead of letting DefaultAzureCredential probe every source in turn.
+    The credential is wrapped in CachingTokenCredential so every caller shares its tokens.
+    """
+    # Same order as DefaultAzureCredential, keyed on the variables each source requires
+    client_id = os.getenv("AZURE_CLIENT_ID")
+    if client_id and os.getenv("AZURE_TENANT_ID") and (
+        os.getenv("AZURE_CLIENT_SECRET") or os.getenv("AZURE_CLIENT_CERTIFICATE_PATH")
+    ):
+        # Service principal tokens can be kept on disk so the next run reuses them instead of
+        # going back to Entra ID (opt-in, see _token_cache_persistence); the CLI, PowerShell
+        # and managed identity sources manage their own caching.
+        inner = EnvironmentCredential(cache_persistence_options=_token_cache_persistence())
+    elif os.getenv("AZURE_FEDERATED_TOKEN_FILE"):
+        # AKS workload identity injects the client ID, tenant ID and token file
+        inner = WorkloadIdentityCredential()
+    elif os.getenv("IDENTITY_ENDPOINT") or os.getenv("MSI_ENDPOINT"):
+        # AZURE_CLIENT_ID, when set here, selects a user-assigned identity
+        inner = ManagedIdentityCredential(client_id=client_id)
+    else:
+        # Developer machine: Azure CLI or Azure PowerShell sign-in, as in AUTH_SETUP_HINT
+        inner = ChainedTokenCredential(AzureCliCredential(), AzurePowerShellCredential())
+    return CachingTokenCredential(inner)
+
+@functools.lru_cache(maxsize=None)
+def get_client(subscription_id):
+    """
+    Returns the Workload Orchestration management client for a subscription.
+    Clients are memoized per subscription and share the credential from get_credential()
+    and the HTTP session in _SESSION.
+    """
+    transport = RequestsTransport(session=_SESSION, session_owner=False)
+    return WorkloadOrchestrationMgmtClient(
+        get_credential(),
+        subscription_id,
+        transport=transport,
+        logging_enable=False
+    )
+
+_PRERELEASE_TYPES = ('alpha', 'beta', 'rc')
+
 def generate_random_semantic_version(include_prerelease=False, include_build=False):
     """
     Generates unique version numbers for schemas and solution templates.
     Uses semantic versioning format (major.minor.patch) to avoid naming conflicts.
     Each run creates unique resource names to prevent Azure resource conflicts.
     """
-    major = random.randint(0, 10)
-    minor = random.randint(0, 20)
-    patch = random.randint(0, 100)
+    # One 32-bit draw sliced into fields; the modulo keeps the original ranges (0-10, 0-20, 0-100)
+    bits = random.getrandbits(32)
+    major = (bits & 0xFF) % 11
+    minor = ((bits >> 8) & 0xFF) % 21
+    patch = (bits >> 16) % 101
     version = f"{major}.{minor}.{patch}"
     
-    if include_prerelease:
-        prerelease_types = ['alpha', 'beta', 'rc']
-        prerelease_type = random.choice(prerelease_types)
-        prerelease_num = random.randint(1, 10)
-        version += f"-{prerelease_type}.{prerelease_num}"
-    
-    if include_build:
-        build_num = random.randint(1, 10000)
-        version += f"+{build_num}"
+    if include_prerelease or include_build:
+        extra = random.getrandbits(32)
+        if include_prerelease:
+            prerelease_type = _PRERELEASE_TYPES[(extra & 0xFF) % len(_PRERELEASE_TYPES)]
+            prerelease_num = ((extra >> 8) & 0xFF) % 10 + 1
+            version += f"-{prerelease_type}.{prerelease_num}"
+        if include_build:
+            build_num = (extra >> 16) % 10000 + 1
+            version += f"+{build_num}"
     
     return version
 
-def get_next_version():
-    try:
-        with open('version.txt', 'r') as f:
-            version = int(f.read().strip())
-    except FileNotFoundError:
-        version = 0
-    
-    with open('version.txt', 'w') as f:
-        f.write(str(version + 1))
+def begin_create_schema(client, resource_group_name, subscription_id):
+    """
+    Starts creating a schema and returns its LROPoller without waiting for it.
+    Lets independent operations be started while the schema provisions.
+    """
+    version = generate_random_semantic_version()
+    schema_name = f"sdkexamples-schema-v{version}"
     
-    return version
+    return client.schemas.begin_create_or_update(
+        resource_group_name=resource_group_name,
+        schema_name=schema_name,
+        resource={
+            "location": LOCATION,
+            "properties": {}
+        },
+        **_FAST_LRO_OPTIONS
+    )
+
+def wait_all(*pollers):
+    """
+    Waits for LROPollers that were started together and returns their results in order.
+    Every poller has been polling in the background since its begin_* call, so the
+    total wait is the slowest operation rather than the sum of all of them.
+    """
+    return [poller.result() for poller in pollers]
 
 def create_schema(client, resource_group_name, subscription_id):
     """
@@ -93,41 +425,10 @@ def create_schema(client, resource_group_name, subscription_id):
     Must be created before creating schema versions. Think of it as creating a "database" 
     before adding "tables" (schema versions).
     """
-    try:
-        version = generate_random_semantic_version()
-        schema_name = f"sdkexamples-schema-v{version}"
-        
-        schema_result = client.schemas.begin_create_or_update(
-            resource_group_name=resource_group_name,
-            schema_name=schema_name,
-            resource={
-                "location": LOCATION,
-                "properties": {}
-            }
-        ).result()
-        return schema_result
-    except Exception as e:
-        print(f"Error creating schema: {e}")
-        raise
+    return begin_create_schema(client, resource_group_name, subscription_id).result()
 
-def create_schema_version(client, resource_group_name, schema_name):
-    """
-    Creates a version for an existing schema with specific YAML configuration rules.
-    PREREQUISITE: Schema must already exist (created by create_schema).
-    This defines the actual validation rules for configuration values that will be used
-    by solution templates. Contains data types, required fields, and editing permissions.
-    """
-    try:
-        # Use semantic versioning
-        version = generate_random_semantic_version()
-        schema_version_name = version
-        schema_version_result = client.schema_versions.begin_create_or_update(
-            resource_group_name=resource_group_name,
-            schema_name=schema_name,
-            schema_version_name=schema_version_name,
-            resource={
-                "properties": {
-                    "value": """rules:
+# Validation rules for the configuration values; the same for every schema version this script creates
+_SCHEMA_VALUE = """rules:
   configs:
     ErrorThreshold:
       type: float
@@ -178,13 +479,56 @@ def create_schema_version(client, resource_group_name, schema_name):
         - line
       editableBy:
         - OT"""
-                }
+
+# Request body is constant too, so it is encoded once at import and sent as bytes
+_SCHEMA_VERSION_RESOURCE = _json_dumps({"properties": {"value": _SCHEMA_VALUE}})
+
+def begin_create_schema_version(client, resource_group_name, schema_name):
+    """
+    Starts creating a schema version and returns its LROPoller without waiting for it.
+    PREREQUISITE: Schema must already exist.
+    """
+    # Use semantic versioning
+    version = generate_random_semantic_version()
+    schema_version_name = version
+    return client.schema_versions.begin_create_or_update(
+        resource_group_name=resource_group_name,
+        schema_name=schema_name,
+        schema_version_name=schema_version_name,
+        resource=_SCHEMA_VERSION_RESOURCE,
+        **_FAST_LRO_OPTIONS
+    )
+
+def create_schema_version(client, resource_group_name, schema_name):
+    """
+    Creates a version for an existing schema with specific YAML configuration rules.
+    PREREQUISITE: Schema must already exist (created by create_schema).
+    This defines the actual validation rules for configuration values that will be used
+    by solution templates. Contains data types, required fields, and editing permissions.
+    """
+    return begin_create_schema_version(client, resource_group_name, schema_name).result()
+
+def begin_create_solution_template(client, resource_group_name, capabilities=None):
+    """
+    Starts creating a solution template and returns its LROPoller without waiting for it.
+    Lets independent operations be started while the template provisions.
+    """
+    if capabilities is None:
+        capabilities = [SINGLE_CAPABILITY_NAME]
+    
+    solution_template_name = "sdkexamples-solution1"
+    return client.solution_templates.begin_create_or_update(
+        resource_group_name=resource_group_name,
+        solution_template_name=solution_template_name,
+        resource={
+            "location": LOCATION,
+            "properties": {
+                "capabilities": capabilities,
+                "description": "This is Holtmelt Solution with random capabilities"
             }
-        ).result()
-        return schema_version_result
-    except Exception as e:
-        print(f"Error creating schema version: {e}")
-        raise
+        },
+        **_LRO_OPTIONS
+    )
 
 def create_solution_template(client, resource_group_name, capabilities=None):
     """
@@ -193,26 +537,68 @@ def create_solution_template(client, resource_group_name, capabilities=None):
     This is the template container - you need to create versions of it next.
     Think of it as creating a "product line" before creating specific "product versions".
     """
-    try:
-        if capabilities is None:
-            capabilities = [SINGLE_CAPABILITY_NAME]
-        
-        solution_template_name = "sdkexamples-solution1"
-        solution_template_result = client.solution_templates.begin_create_or_update(
-            resource_group_name=resource_group_name,
-            solution_template_name=solution_template_name,
-            resource={
-                "location": LOCATION,
+    return begin_create_solution_template(client, resource_group_name, capabilities).result()
+
+# Solution template version properties that are the same on every call. Only the
+# configurations string and the version name vary, so each call builds a small
+# body around these (the nested structure is shared, not copied, since the body
+# is serialized immediately).
+_YAML_HEAD = "schema:\n  name: "
+_YAML_TAIL = """
+configs:
+  AppName: Hotmelt
+  TemperatureRangeMax: ${{$val(TemperatureRangeMax)}}
+  ErrorThreshold: ${{$val(ErrorThreshold)}}
+  HealthCheckEndpoint: ${{$val(HealthCheckEndpoint)}}
+  EnableLocalLog: ${{$val(EnableLocalLog)}}
+  AgentEndpoint: ${{$val(AgentEndpoint)}}
+  HealthCheckEnabled: ${{$val(HealthCheckEnabled)}}
+  ApplicationEndpoint: ${{$val(ApplicationEndpoint)}}
+"""
+
+@functools.lru_cache(maxsize=64)
+def _build_configurations_str(schema_name, schema_version):
+    return "".join([_YAML_HEAD, schema_name, "\n  version: ", schema_version, _YAML_TAIL])
+
+_SOL_TMPL_PROPERTIES = {
+    "specification": {
+        "components": [
+            {
+                "name": "helmcomponent",
+                "type": "helm.v3",
                 "properties": {
-                    "capabilities": capabilities,
-                    "description": "This is Holtmelt Solution with random capabilities"
+                    "chart": {
+                        "repo": "ghcr.io/eclipse-symphony/tests/helm/simple-chart",
+                        "version": "0.3.0",
+                        "wait": True,
+                        "timeout": "5m"
+                    }
                 }
             }
-        ).result()
-        return solution_template_result
-    except Exception as e:
-        print(f"Error creating solution template: {e}")
-        raise
+        ]
+    },
+    "orchestratorType": "TO"
+}
+
+def begin_create_solution_template_version(client, resource_group_name, solution_template_name, schema_name, schema_version):
+    """
+    Starts creating a solution template version and returns its LROPoller without waiting for it.
+    PREREQUISITES: Solution template and schema version must exist.
+    """
+    # Generate a clean version number without pre-release or build info
+    version = generate_random_semantic_version(include_prerelease=False, include_build=False)
+    solution_template_version_name = version
+    properties = {"configurations": _build_configurations_str(schema_name, schema_version), **_SOL_TMPL_PROPERTIES}
+    body = {
+        "solutionTemplateVersion": {"properties": properties},
+        "version": solution_template_version_name
+    }
+    return client.solution_templates.begin_create_version(
+        resource_group_name=resource_group_name,
+        solution_template_name=solution_template_name,
+        body=_json_dumps(body),
+        **_LRO_OPTIONS
+    )
 
 def create_solution_template_version(client, resource_group_name, solution_template_name, schema_name, schema_version):
     """
@@ -221,56 +607,7 @@ def create_solution_template_version(client, resource_group_name, solution_templ
     This links the schema rules to actual deployment configurations and Helm charts.
     Contains the "recipe" for how to deploy the solution on targets.
     """
-    try:
-        # Generate a clean version number without pre-release or build info
-        version = generate_random_semantic_version(include_prerelease=False, include_build=False)
-        solution_template_version_name = version
-        configurations_str = f"""schema:
-  name: {schema_name}
-  version: {schema_version}
-configs:
-  AppName: Hotmelt
-  TemperatureRangeMax: ${{{{$val(TemperatureRangeMax)}}}}
-  ErrorThreshold: ${{{{$val(ErrorThreshold)}}}}
-  HealthCheckEndpoint: ${{{{$val(HealthCheckEndpoint)}}}}
-  EnableLocalLog: ${{{{$val(EnableLocalLog)}}}}
-  AgentEndpoint: ${{{{$val(AgentEndpoint)}}}}
-  HealthCheckEnabled: ${{{{$val(HealthCheckEnabled)}}}}
-  ApplicationEndpoint: ${{{{$val(ApplicationEndpoint)}}}}
-"""
-        solution_template_version_result = client.solution_templates.begin_create_version(
-            resource_group_name=resource_group_name,
-            solution_template_name=solution_template_name,
-            body={
-                "solutionTemplateVersion": {
-                    "properties": {
-                        "configurations": configurations_str,
-                        "specification": {
-                            "components": [
-                                {
-                                    "name": "helmcomponent",
-                                    "type": "helm.v3",
-                                    "properties": {
-                                        "chart": {
-                                            "repo": "ghcr.io/eclipse-symphony/tests/helm/simple-chart",
-                                            "version": "0.3.0",
-                                            "wait": True,
-                                            "timeout": "5m"
-                                        }
-                                    }
-                                }
-                            ]
-                        },
-                        "orchestratorType": "TO"
-                    }
-                },
-                "version": solution_template_version_name
-            }
-        ).result()
-        return solution_template_version_result
-    except Exception as e:
-        print(f"Error creating solution template version: {e}")
-        raise
+    return begin_create_solution_template_version(client, resource_group_name, solution_template_name, schema_name, schema_version).result()
 
 def create_target(client, resource_group_name, capabilities=None):
     """
@@ -287,15 +624,15 @@ def create_target(client, resource_group_name, capabilities=None):
         target_result = client.targets.begin_create_or_update(
             resource_group_name=resource_group_name,
             target_name=target_name,
-            resource={
+            resource=_json_dumps({
                 "extendedLocation": {
-                    "name": "/subscriptions/973d15c6-6c57-447e-b9c6-6d79b5b784ab/resourceGroups/configmanager-cloudtest-playground-portal/providers/Microsoft.ExtendedLocation/customLocations/den-Location",
+                    "name": _EXT_LOC_ID,
                     "type": "CustomLocation"
                 },
                 "location": LOCATION,
                 "properties": {
                     "capabilities": capabilities,
-                    "contextId": f"/subscriptions/973d15c6-6c57-447e-b9c6-6d79b5b784ab/resourceGroups/{CONTEXT_RESOURCE_GROUP}/providers/Microsoft.Edge/contexts/{CONTEXT_NAME}",
+                    "contextId": _CTX_ID,
                     "description": "This is MK-71 Site with random capabilities",
                     "displayName": "sdkbox-mk71",
                     "hierarchyLevel": "line",
@@ -316,15 +653,12 @@ def create_target(client, resource_group_name, capabilities=None):
                         ]
                     }
                 }
-            }
+            }),
+            **_LRO_OPTIONS
         ).result()
         return target_result
 
-    try:
-        return retry_operation(create_operation)
-    except Exception as e:
-        print(f"Error creating target: {e}")
-        raise
+    return retry_operation(create_operation)
 
 def review_target(client, resource_group_name, target_name, solution_template_version_id):
     """
@@ -334,7 +668,7 @@ def review_target(client, resource_group_name, target_name, solution_template_ve
     ready for publishing. Like getting deployment approval before going live.
     """
     def review_operation():
-        print(f"Starting review for target {target_name}")
+        logger.info("Starting review for target %s", target_name)
         review_result = client.targets.begin_review_solution_version(
             resource_group_name=resource_group_name,
             target_name=target_name,
@@ -348,7 +682,7 @@ def review_target(client, resource_group_name, target_name, solution_template_ve
 
     try:
         review_result = retry_operation(review_operation)
-        print(review_result)
+        logger.debug("Review result: %s", review_result)
 
         # Handle response that might be wrapped in _data
         if hasattr(review_result, '_data'):
@@ -367,19 +701,18 @@ def review_target(client, resource_group_name, target_name, solution_template_ve
             version_id = properties.get('id')
             
             if version_id:
-                print(f"Found solution version ID: {version_id}")
+                logger.info("Found solution version ID: %s", version_id)
                 return version_id
             
             # Debug output for troubleshooting
-            print("Debug - Full response:", response_dict)
-            print("Debug - Properties:", properties)
-            print("Debug - Nested properties:", nested_props)
+            logger.debug("Full response: %s", response_dict)
+            logger.debug("Properties: %s", properties)
             raise ValueError("Could not find solutionTemplateVersionId in review response")
         except Exception as e:
-            print(f"Debug - Error: {str(e)}")
+            logger.debug("Error: %s", e)
             raise ValueError(f"Error extracting solutionTemplateVersionId: {str(e)}")
     except Exception as e:
-        print(f"Error reviewing target: {e}")
+        logger.error("Error reviewing target: %s", e)
         raise
 
 def publish_target(client, resource_group_name, target_name, solution_version_id):
@@ -390,21 +723,22 @@ def publish_target(client, resource_group_name, target_name, solution_version_id
     Like releasing software from staging to production-ready.
     """
     def publish_operation():
-        print(f"Publishing solution version to target {target_name}")
+        logger.info("Publishing solution version to target %s", target_name)
         publish_result = client.targets.begin_publish_solution_version(
             resource_group_name=resource_group_name,
             target_name=target_name,
             body={
                 "solutionVersionId": solution_version_id
-            }
+            },
+            **_PUBLISH_LRO_OPTIONS
         ).result()
-        print("Publish operation completed successfully")
+        logger.info("Publish operation completed successfully")
         return publish_result
 
     try:
         return retry_operation(publish_operation)
     except Exception as e:
-        print(f"Error publishing to target: {e}")
+        logger.error("Error publishing to target: %s", e)
         raise
 
 def install_target(client, resource_group_name, target_name, solution_version_id):
@@ -415,7 +749,7 @@ def install_target(client, resource_group_name, target_name, solution_version_id
     Like installing and starting the application in production.
     """
     def install_operation():
-        print(f"Installing solution version on target {target_name}")
+        logger.info("Installing solution version on target %s", target_name)
         install_result = client.targets.begin_install_solution(
             resource_group_name=resource_group_name,
             target_name=target_name,
@@ -426,126 +760,168 @@ def install_target(client, resource_group_name, target_name, solution_version_id
         
         # Store the install job ID from the response
         install_job_id = install_result.job_id if hasattr(install_result, 'job_id') else None
-        print(f"Install operation completed. Job ID: {install_job_id}")
+        logger.info("Install operation completed. Job ID: %s", install_job_id)
         return install_result
 
     try:
         return retry_operation(install_operation)
     except Exception as e:
-        print(f"Error installing on target: {e}")
+        logger.error("Error installing on target: %s", e)
         raise
 
-def create_configuration_api_call(credential, subscription_id, resource_group, config_name, solution_name, version, config_values):
+def _format_config_value(value):
+    """
+    Formats one configuration value the way the CLI writes it into the values YAML:
+    booleans as lowercase true/false, strings unquoted, everything else via str().
+    """
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return value if isinstance(value, str) else str(value)
+
+class ConfigApi:
+    """
+    One dynamic configuration of a solution on the Configuration REST API.
+    The URL is built once and every call goes through the shared session with a cached
+    bearer token, so the PUT and the verifying GET reuse the same connection and token.
+    """
+    def __init__(self, credential, edge_prefix, config_name, solution_name):
+        self.credential = credential
+        # API URL with correct API version (matching CLI format); edge_prefix is the resource
+        # group's Microsoft.Edge provider URL, as built in main()
+        self.url = f"{edge_prefix}/configurations/{config_name}/DynamicConfigurations/{solution_name}/versions/version1?api-version=2024-06-01-preview"
+        self.session = _SESSION
+
+    def _headers(self):
+        token = self.credential.get_token(ARM_SCOPE)
+        return {"Authorization": f"Bearer {token.token}"}
+
+    def put(self, body):
+        """Sends body, already-encoded JSON bytes, as the configuration resource."""
+        headers = self._headers()
+        headers["Content-Type"] = "application/json"
+        return self.session.put(self.url, headers=headers, data=body)
+
+    def get(self):
+        # No body, so no Content-Type
+        return self.session.get(self.url, headers=self._headers())
+
+def configuration_body(config_values):
+    """
+    Encodes the Configuration API request body for config_values, with the values
+    written as the YAML-style string the CLI sends.
+    """
+    # Build values string from config_values dictionary matching CLI format
+    values_string = "".join(f"{key}: {_format_config_value(value)}\n" for key, value in config_values.items())
+    
+    # Request body with all configuration values
+    return _json_dumps({
+        "properties": {
+            "values": values_string,
+            "provisioningState": "Succeeded"
+        }
+    })
+
+# CONFIG_VALUES never changes, so its request body is encoded once at import
+_CONFIG_VALUES_BODY = configuration_body(CONFIG_VALUES)
+
+def create_configuration_api_call(api, body):
     """
     Sets dynamic configuration values for a solution using direct REST API calls.
     This provides configuration data that the deployed solution will use at runtime.
     Called before reviewing the target to ensure configuration is available.
+    body is the encoded request from configuration_body().
     """
     try:
-        # Get bearer token from DefaultAzureCredential
-        token = credential.get_token("https://management.azure.com/.default")
-        bearer_token = token.token
-        
-        # Construct the API URL with correct API version (matching CLI format)
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Edge/configurations/{config_name}/DynamicConfigurations/{solution_name}/versions/version1?api-version=2024-06-01-preview"
-        
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "Content-Type": "application/json"
-        }
-        
-        # Build values string from config_values dictionary matching CLI format
-        values_lines = []
-        for key, value in config_values.items():
-            if isinstance(value, bool):
-                # Convert boolean to lowercase string (true/false, not "true"/"false")
-                values_lines.append(f"{key}: {str(value).lower()}")
-            elif isinstance(value, str):
-                # String values without quotes in YAML format
-                values_lines.append(f"{key}: {value}")
-            else:
-                # Numbers and other types
-                values_lines.append(f"{key}: {value}")
-        
-        values_string = "\n".join(values_lines) + "\n"
+        logger.info("Making PUT call to Configuration API")
         
-        # Request body with all configuration values
-        request_body = {
-            "properties": {
-                "values": values_string,
-                "provisioningState": "Succeeded"
-            }
-        }
-        
-        print(f"Making PUT call to Configuration API")
-        
-        response = requests.put(url, headers=headers, json=request_body)
+        response = api.put(body)
         
         if response.status_code in [200, 201, 202]:
-            print(f"Configuration API call successful. Status: {response.status_code}")
-            return response
+            logger.info("Configuration API call successful. Status: %s", response.status_code)
+        elif response.ok:
+            # Not an error status, so raise_for_status() wouldn't raise; hand the
+            # response back rather than falling through to None
+            logger.warning("Configuration API call returned unexpected status: %s", response.status_code)
         else:
-            print(f"Configuration API call failed. Status: {response.status_code}")
-            print(f"Response: {response.text}")
+            logger.error("Configuration API call failed. Status: %s", response.status_code)
+            logger.error("Response: %s", response.text)
             response.raise_for_status()
+        return response
             
     except Exception as e:
-        print(f"Error calling Configuration API: {e}")
+        logger.error("Error calling Configuration API: %s", e)
         raise
 
-def get_configuration_api_call(credential, subscription_id, resource_group, config_name, solution_name, version):
+def _stored_values(response):
+    """
+    Returns the properties.values string echoed in a Configuration API response body,
+    or None when the body is empty, not JSON, or carries no values.
+    """
+    if not response.content:
+        return None
+    try:
+        body = _json_loads(response.content)
+    except json.JSONDecodeError:
+        return None
+    properties = body.get('properties') if isinstance(body, dict) else None
+    return properties.get('values') if isinstance(properties, dict) else None
+
+def get_configuration_api_call(api):
     """
     Retrieves and verifies configuration values that were set via the Configuration API.
     Used to confirm that configuration was properly stored and is available to the solution.
     """
     try:
-        # Get bearer token from DefaultAzureCredential
-        token = credential.get_token("https://management.azure.com/.default")
-        bearer_token = token.token
-        
-        # Construct the API URL (same as PUT but for GET)
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Edge/configurations/{config_name}/DynamicConfigurations/{solution_name}/versions/version1?api-version=2024-06-01-preview"
-        
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "Content-Type": "application/json"
-        }
+        logger.info("Making GET call to Configuration API")
         
-        print(f"Making GET call to Configuration API")
-        
-        response = requests.get(url, headers=headers)
+        response = api.get()
         
         if response.status_code in [200]:
-            print(f"Configuration GET API call successful. Status: {response.status_code}")
+            logger.info("Configuration GET API call successful. Status: %s", response.status_code)
             
             # Try to parse and display the configuration values
             try:
-                response_json = response.json()
+                response_json = _json_loads(response.content)
                 # Extract and display the actual values if they exist
                 if 'properties' in response_json and 'values' in response_json['properties']:
-                    print(f"Configuration Values retrieved")
+                    logger.info("Configuration Values retrieved")
+                    logger.debug("Configuration Values:\n%s", response_json['properties']['values'])
                     
             except json.JSONDecodeError:
-                print("Response is not valid JSON")
+                logger.warning("Response is not valid JSON")
                 
             return response
         else:
-            print(f"Configuration GET API call failed. Status: {response.status_code}")
+            logger.warning("Configuration GET API call failed. Status: %s", response.status_code)
             # Don't raise exception for GET failures as it might be expected
             return None
             
     except Exception as e:
-        print(f"Error calling Configuration GET API: {e}")
+        logger.error("Error calling Configuration GET API: %s", e)
         return None
 
+def _as_dict(cap):
+    """Normalizes a capability, plain dict or SDK model, into a name/description dict."""
+    # SDK models, the common case, expose attributes; dicts and other mappings are read by key
+    try:
+        name = cap.name
+    except AttributeError:
+        if isinstance(cap, Mapping):
+            return {"name": cap.get('name', ''), "description": cap.get('description', '')}
+        return {"name": '', "description": ''}
+    return {"name": name, "description": getattr(cap, 'description', '')}
+
 def get_existing_context(client, resource_group_name, context_name):
     """
     Fetches an existing Azure Context to get current capabilities.
     Contexts coordinate capabilities across multiple targets in an organization.
     This allows us to add new capabilities while preserving existing ones.
+    Capabilities are returned as plain name/description dicts.
     """
     try:
-        print(f"Fetching existing context: {context_name}")
+        logger.info("Fetching existing context: %s", context_name)
         context = client.contexts.get(
             resource_group_name=resource_group_name,
             context_name=context_name
@@ -555,18 +931,18 @@ def get_existing_context(client, resource_group_name, context_name):
         if hasattr(context, 'properties') and hasattr(context.properties, 'capabilities'):
             existing_capabilities = context.properties.capabilities
         
-        print(f"Found {len(existing_capabilities)} existing capabilities")
-        return existing_capabilities
+        logger.info("Found %d existing capabilities", len(existing_capabilities))
+        return [_as_dict(cap) for cap in existing_capabilities]
         
     except HttpResponseError as e:
         if e.status_code == 404:
-            print("Context not found, will create new one")
+            logger.info("Context not found, will create new one")
             return []
         else:
-            print(f"Error fetching context: {e}")
+            logger.error("Error fetching context: %s", e)
             raise
     except Exception as e:
-        print(f"Error fetching context: {e}")
+        logger.error("Error fetching context: %s", e)
         return []
 
 def generate_single_random_capability():
@@ -584,7 +960,7 @@ def generate_single_random_capability():
         "description": f"SDK generated {cap_type} manufacturing capability"
     }
     
-    print(f"Generated single random capability: {capability['name']}")
+    logger.info("Generated single random capability: %s", capability['name'])
     return capability
 
 def merge_capabilities_with_uniqueness(existing_capabilities, new_capabilities):
@@ -592,68 +968,36 @@ def merge_capabilities_with_uniqueness(existing_capabilities, new_capabilities):
     Safely merges new capabilities with existing ones, avoiding duplicates.
     Ensures capability names remain unique across the context.
     Used when updating contexts to add new manufacturing capabilities.
+    Both lists must hold plain dicts; get_existing_context() already returns them that way.
     """
-    print(f"Merging capabilities: {len(existing_capabilities)} existing + {len(new_capabilities)} new")
+    logger.debug("Merging capabilities: %d existing + %d new", len(existing_capabilities), len(new_capabilities))
     
-    # Process existing capabilities
-    existing_names = set()
-    merged_capabilities = []
-    
-    for cap in existing_capabilities:
-        if isinstance(cap, dict):
+    # Keyed by name so the first occurrence wins; output is plain dicts without a state field
+    merged = {}
+    for capabilities in (existing_capabilities, new_capabilities):
+        for cap in capabilities:
             cap_name = cap.get('name', '')
-            cap_desc = cap.get('description', '')
-        else:
-            cap_name = getattr(cap, 'name', '')
-            cap_desc = getattr(cap, 'description', '')
-        
-        if cap_name and cap_name not in existing_names:
-            existing_names.add(cap_name)
-            # Convert to dict format without state field
-            capability_dict = {
-                "name": cap_name,
-                "description": cap_desc
-            }
-            merged_capabilities.append(capability_dict)
-    
-    # Process new capabilities
-    for cap in new_capabilities:
-        cap_name = cap.get('name', '') if isinstance(cap, dict) else getattr(cap, 'name', '')
-        
-        if cap_name not in existing_names:
-            existing_names.add(cap_name)
-            # Ensure new capabilities don't have state field
-            capability_dict = {
-                "name": cap.get('name', '') if isinstance(cap, dict) else getattr(cap, 'name', ''),
-                "description": cap.get('description', '') if isinstance(cap, dict) else getattr(cap, 'description', '')
-            }
-            merged_capabilities.append(capability_dict)
+            if cap_name and cap_name not in merged:
+                merged[cap_name] = {"name": cap_name, "description": cap.get('description', '')}
     
-    # Validation check
-    expected_max = len(existing_capabilities) + len(new_capabilities)
-    if len(merged_capabilities) > expected_max:
-        raise ValueError(f"Capability merge validation failed: count {len(merged_capabilities)} > {expected_max}")
-    
-    # Final validation: ensure all merged capabilities have required fields
-    for cap in merged_capabilities:
-        if not isinstance(cap, dict):
-            raise ValueError(f"Invalid capability format: {type(cap)}")
-        if not cap.get('name'):
-            raise ValueError(f"Capability missing name: {cap}")
-    
-    print(f"Capability merge completed: {len(merged_capabilities)} total capabilities")
-    return merged_capabilities
+    logger.debug("Capability merge completed: %d total capabilities", len(merged))
+    return list(merged.values())
 
 def save_capabilities_to_json(capabilities, filename="context-capabilities.json"):
     """
     Save capabilities to JSON file
     """
     try:
-        with open(filename, 'w') as f:
-            json.dump(capabilities, f, indent=2)
-        print(f"Capabilities saved to {filename}")
+        if orjson is not None:
+            payload = orjson.dumps(capabilities, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(capabilities, indent=2).encode("utf-8")
+        # Encoded up front and written in one call
+        with open(filename, 'wb') as f:
+            f.write(payload)
+        logger.info("Capabilities saved to %s", filename)
     except Exception as e:
-        print(f"Error saving capabilities to JSON: {e}")
+        logger.error("Error saving capabilities to JSON: %s", e)
         raise
 
 def create_or_update_context_with_hierarchies(client, resource_group_name, context_name, capabilities):
@@ -678,17 +1022,12 @@ def create_or_update_context_with_hierarchies(client, resource_group_name, conte
             }
         }
         
-        print(f"Creating/updating context: {context_name}")
-        context_result = client.contexts.begin_create_or_update(
-            resource_group_name=resource_group_name,
-            context_name=context_name,
-            resource=resource
-        ).result()
-        
+        logger.info("Creating/updating context: %s", context_name)
         context_result = client.contexts.begin_create_or_update(
             resource_group_name=resource_group_name,
             context_name=context_name,
-            resource=resource
+            resource=resource,
+            **_LRO_OPTIONS
         ).result()
         
         return context_result
@@ -696,7 +1035,7 @@ def create_or_update_context_with_hierarchies(client, resource_group_name, conte
     try:
         return retry_operation(context_operation)
     except Exception as e:
-        print(f"Error creating/updating context: {e}")
+        logger.error("Error creating/updating context: %s", e)
         raise
 
 def manage_azure_context(client, resource_group_name=CONTEXT_RESOURCE_GROUP, context_name=CONTEXT_NAME):
@@ -728,258 +1067,262 @@ def manage_azure_context(client, resource_group_name=CONTEXT_RESOURCE_GROUP, con
             client, resource_group_name, context_name, merged_capabilities
         )
         
-        print(f"Context management completed successfully: {context_result.name}")
+        logger.info("Context management completed successfully: %s", context_result.name)
         return context_result
         
     except Exception as e:
-        print(f"Error in context management workflow: {e}")
+        logger.error("Error in context management workflow: %s", e)
         raise
 
+def settle_target(target_future):
+    """
+    Accounts for the step 2 target creation when the workflow stops before using it.
+    The worker thread can't be interrupted and the interpreter joins it at exit anyway,
+    so this waits for it and logs the outcome instead of dropping it silently; a target
+    that did get created is named so it can be reused or deleted.
+    """
+    if target_future.cancel():
+        return
+    logger.info("Waiting for the target creation started in step 2 to finish...")
+    try:
+        target = target_future.result()
+    except Exception as e:
+        logger.error("Target creation failed as well: %s", e)
+    else:
+        logger.warning("Target %s was created but is not used by this run", target.name)
+
 def main():
     """
     This script authenticates with Azure and creates various resources.
-    It uses DefaultAzureCredential for authentication.
+    The credential is chosen from the environment by get_credential().
     """
     try:
         subscription_id = SUBSCRIPTION_ID
         if not subscription_id:
-            print("Error: AZURE_SUBSCRIPTION_ID environment variable not set.")
+            logger.error("Error: AZURE_SUBSCRIPTION_ID environment variable not set.")
             return
 
-        # Try DefaultCredentials first
+        # Fail fast on missing sign-in; the token is cached and reused by the first ARM request
         try:
-            credential = DefaultAzureCredential()
-            # Test the credential by getting a token
-            credential.get_token("https://management.azure.com/.default")
-            print("Successfully authenticated using environment variables.")
-        except Exception as e:
-            print("Environment credential failed:", str(e))
-            print("\nFalling back to DefaultAzureCredential...")
-            try:
-                credential = DefaultAzureCredential()
-                credential.get_token("https://management.azure.com/.default")
-                print("Successfully authenticated using DefaultAzureCredential.")
-            except Exception as auth_error:
-                print("\nAuthentication failed:")
-                print(str(auth_error))
-                print(AUTH_SETUP_HINT)
-                return
+            get_credential().get_token(ARM_SCOPE)
+        except Exception as auth_error:
+            logger.error("\nAuthentication failed:")
+            logger.error("%s", auth_error)
+            logger.error(AUTH_SETUP_HINT)
+            return
 
         # Create the management client with subscription ID
-        workload_client = WorkloadOrchestrationMgmtClient(credential, subscription_id)
+        workload_client = get_client(subscription_id)
 
-        print("Successfully authenticated with Azure.")
+        logger.info("Successfully authenticated with Azure.")
         
         resource_group_name = RESOURCE_GROUP
+        # Microsoft.Edge provider URL of the resource group, for the raw REST calls
+        edge_prefix = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{resource_group_name}/providers/Microsoft.Edge"
 
         # STEP 1: Manage Azure context with random capabilities
-        print("=" * 50)
-        print("STEP 1: Managing Azure Context with Random Capabilities")
-        print("=" * 50)
+        logger.info(BANNER50)
+        logger.info("STEP 1: Managing Azure Context with Random Capabilities")
+        logger.info(BANNER50)
         try:
             # Use hardcoded values for context management
             context_result = manage_azure_context(workload_client)
             
             # Extract the NEWLY ADDED capability from context for use in all resources
-            capabilities = None
-            print(f"Extracting capability from context result...")
+            logger.debug("Extracting capability from context result...")
+            context_capabilities = getattr(getattr(context_result, 'properties', None), 'capabilities', None) or ()
+            logger.debug("Found %s capabilities in context", len(context_capabilities))
             
-            if hasattr(context_result, 'properties') and hasattr(context_result.properties, 'capabilities'):
-                context_capabilities = context_result.properties.capabilities
-                print(f"Found {len(context_capabilities)} capabilities in context")
-                
-                if context_capabilities:
-                    # Get the LAST capability (which should be the newly added one)
-                    last_cap = context_capabilities[-1]
-                    
-                    cap_name = last_cap.get('name', '') if isinstance(last_cap, dict) else getattr(last_cap, 'name', '')
-                    if cap_name:
-                        capabilities = [cap_name]
-                        print(f"Selected capability for all resources: {capabilities[0]}")
-                else:
-                    print("No capabilities found in context")
+            # The LAST capability should be the newly added one
+            cap_name = _as_dict(context_capabilities[-1]).get('name') if context_capabilities else None
+            if cap_name:
+                capabilities = [cap_name]
+                logger.info("Selected capability for all resources: %s", capabilities[0])
             else:
-                print("Context result has no capabilities property")
-            
-            if not capabilities:
                 # Generate a single random capability if none found in context
-                print("No valid capability found, generating new one...")
+                logger.debug("No valid capability found, generating new one...")
                 new_capability = generate_single_random_capability()
                 capabilities = [new_capability['name']]
-                print(f"Generated new capability for all resources: {capabilities[0]}")
+                logger.info("Generated new capability for all resources: %s", capabilities[0])
         except Exception as e:
-            print(f"Context management failed, generating new random capability: {e}")
+            logger.warning("Context management failed, generating new random capability: %s", e)
             new_capability = generate_single_random_capability()
             capabilities = [new_capability['name']]
-            print(f"FALLBACK CAPABILITY FOR ALL RESOURCES: {capabilities[0]}")
+            logger.info("FALLBACK CAPABILITY FOR ALL RESOURCES: %s", capabilities[0])
             
         # Validate that we have a capability selected
         if not capabilities or not capabilities[0]:
-            print("ERROR: No capability was selected! Using fallback.")
+            logger.error("ERROR: No capability was selected! Using fallback.")
             capabilities = [SINGLE_CAPABILITY_NAME]
             
-        print(f"\nFINAL CAPABILITY SELECTION: {capabilities[0]}")
-        print("=" * 60)
+        logger.info("\nFINAL CAPABILITY SELECTION: %s", capabilities[0])
+        logger.info(BANNER60)
 
         # Wait 30 seconds after capability selection
-        print("\nWaiting 30 seconds after capability selection...")
+        logger.info("\nWaiting 30 seconds after capability selection...")
         time.sleep(30)
-        print("Continuing with resource creation...\n")
+        logger.info("Continuing with resource creation...\n")
+
+        logger.info(BANNER50)
+        logger.info("STEP 2: Creating Azure Resources")
+        logger.info(BANNER50)
+
+        # The target only needs the capability, so it is created on a worker thread
+        # (with its own retries) while the schema and solution template chain runs
+        logger.info("Creating target in resource group: %s", resource_group_name)
+        logger.info("Using capability: %s", capabilities)
+        executor = ThreadPoolExecutor(max_workers=1)
+        target_future = executor.submit(create_target, workload_client, resource_group_name, capabilities)
+        executor.shutdown(wait=False)  # No more work; the worker exits once the target is done
 
-        print("=" * 50)
-        print("STEP 2: Creating Azure Resources")
-        print("=" * 50)
         try:
-            # Create a new schema
-            print(f"Creating schema in resource group: {resource_group_name}")
-            schema = create_schema(workload_client, resource_group_name, subscription_id)
-            print(f"Schema created successfully: {schema.name}")
+            # Schema and solution template don't depend on each other, so both
+            # long-running operations are started before waiting on either one
+            logger.info("Creating schema and solution template in resource group: %s", resource_group_name)
+            logger.info("Using capability: %s", capabilities)
+            schema_poller = begin_create_schema(workload_client, resource_group_name, subscription_id)
+            solution_template_poller = begin_create_solution_template(workload_client, resource_group_name, capabilities)
+            schema = ResRef(schema_poller.result().name)
+            logger.info("Schema created successfully: %s", schema.name)
 
-            # Create a new schema version
-            print(f"Creating schema version for schema: {schema.name}")
-            schema_version = create_schema_version(workload_client, resource_group_name, schema.name)
-            print(f"Schema version created successfully: {schema_version.name}")
+            # The schema version only needs the schema, so it is started right away
+            # while the solution template may still be provisioning
+            logger.info("Creating schema version for schema: %s", schema.name)
+            schema_version_poller = begin_create_schema_version(workload_client, resource_group_name, schema.name)
+            solution_template_result, schema_version_result = wait_all(solution_template_poller, schema_version_poller)
+            solution_template = ResRef(solution_template_result.name)
+            logger.info("Solution template created successfully: %s", solution_template.name)
+            schema_version = ResRef(schema_version_result.name)
+            logger.info("Schema version created successfully: %s", schema_version.name)
 
         except Exception as e:
-            print(f"An error occurred during resource creation: {e}")
+            logger.error("An error occurred during resource creation: %s", e)
+            settle_target(target_future)
             return
 
-        print("Proceeding with solution template and target creation...")
-        print()
+        logger.info("Proceeding with solution template version and target creation...")
+        logger.info("")
 
         try:
-            # Create a new solution template with the same random capability
-            print(f"Creating solution template in resource group: {resource_group_name}")
-            print(f"Using capability: {capabilities}")
-            solution_template = create_solution_template(workload_client, resource_group_name, capabilities)
-            print(f"Solution template created successfully: {solution_template.name}")
-
-            # Create a new solution template version
-            print(f"Creating solution template version for template: {solution_template.name}")
-            solution_template_version_result = create_solution_template_version(workload_client, resource_group_name, solution_template.name, schema.name, schema_version.name)
-            print(f"Solution template version created successfully: {solution_template_version_result}")
-
-            # Extract the solution template version ID from the response properties
-            if (hasattr(solution_template_version_result, 'properties') and
-                hasattr(solution_template_version_result.properties, 'solutionTemplateVersionId')):
-                solution_template_version_id = solution_template_version_result.properties.solutionTemplateVersionId
-            else:
-                solution_template_version_id = solution_template_version_result.properties.get('solutionTemplateVersionId')
+            # Start a new solution template version; it keeps provisioning while the
+            # target finishes and the configuration values are set in step 3.
+            # createVersion is a POST, which the SDK's RetryPolicy only retries on
+            # 500/503/504, so retry_operation also covers throttling and timeouts
+            logger.info("Creating solution template version for template: %s", solution_template.name)
+            solution_template_version_poller = retry_operation(functools.partial(begin_create_solution_template_version, workload_client, resource_group_name, solution_template.name, schema.name, schema_version.name))
+        except Exception as e:
+            logger.error("An error occurred during solution template version creation: %s", e)
+            settle_target(target_future)
+            return
 
-            # Create a new target with the same random capability
-            print(f"Creating target in resource group: {resource_group_name}")
-            print(f"Using capability: {capabilities}")
-            target = create_target(workload_client, resource_group_name, capabilities)
-            print(f"Target created successfully: {target.name}")
+        try:
+            # Wait for the target started at the beginning of this step
+            target_name = target_future.result().name
+            config_name = target_name + "Config"  # Configuration name should be targetName+Config
+            logger.info("Target created successfully: %s", target_name)
 
         except Exception as e:
-            print(f"An error occurred during target creation: {e}")
+            logger.error("An error occurred during target creation: %s", e)
             return
 
         # STEP 3: Configuration API Call - Set configuration values before review
-        print("=" * 50)
-        print("STEP 3: Setting Configuration Values via Configuration API")
-        print("=" * 50)
+        logger.info(BANNER50)
+        logger.info("STEP 3: Setting Configuration Values via Configuration API")
+        logger.info(BANNER50)
         try:
             # Configuration parameters for the API call
-            config_name = target.name + "Config"  # Configuration name should be targetName+Config
             solution_name = "sdkexamples-solution1"  # Use hardcoded solution template name
             version = "1.0.0"  # Configuration version
             
-            # Configuration values matching the schema
-            config_values = {
-                "ErrorThreshold": 35.3,
-                "HealthCheckEndpoint": "http://localhost:8080/health",
-                "EnableLocalLog": True,
-                "AgentEndpoint": "http://localhost:8080/agent",
-                "HealthCheckEnabled": True,
-                "ApplicationEndpoint": "http://localhost:8080/app",
-                "TemperatureRangeMax": 100.5
-            }
+            logger.info("Calling Configuration API with:")
+            logger.info("  Config Name: %s", config_name)
+            logger.info("  Solution Name: %s", solution_name)
+            logger.info("  Version: %s", version)
+            logger.info("  Configuration Values: %s", dict(CONFIG_VALUES))
             
-            print(f"Calling Configuration API with:")
-            print(f"  Config Name: {config_name}")
-            print(f"  Solution Name: {solution_name}")
-            print(f"  Version: {version}")
-            print(f"  Configuration Values:")
-            for key, value in config_values.items():
-                print(f"    {key}: {value}")
+            # One client for the PUT and the verifying GET below
+            config_api = ConfigApi(get_credential(), edge_prefix, config_name, solution_name)
+            config_response = retry_operation(functools.partial(create_configuration_api_call, config_api, _CONFIG_VALUES_BODY))
+            logger.info("Configuration API call completed successfully")
             
-            config_response = create_configuration_api_call(
-                credential,
-                subscription_id,
-                resource_group_name,
-                config_name,
-                solution_name,
-                version,
-                config_values
-            )
-            print("Configuration API call completed successfully")
-            
-            # STEP 3.1: GET Configuration to verify the values were set correctly
-            print("\n" + "=" * 50)
-            print("STEP 3.1: Getting Configuration to verify values")
-            print("=" * 50)
-            try:
-                get_response = get_configuration_api_call(
-                    credential,
-                    subscription_id,
-                    resource_group_name,
-                    config_name,
-                    solution_name,
-                    version
-                )
-                if get_response:
-                    print("Configuration GET call completed successfully")
-                else:
-                    print("Configuration GET call returned no data")
-            except Exception as get_error:
-                print(f"Configuration GET call failed: {get_error}")
+            # STEP 3.1: GET Configuration to verify the values were set correctly.
+            # A synchronous PUT already returns the stored resource, so the GET is
+            # only needed when the response didn't echo the values back (e.g. 202)
+            logger.info("\n" + BANNER50)
+            logger.info("STEP 3.1: Getting Configuration to verify values")
+            logger.info(BANNER50)
+            if config_response.status_code in (200, 201) and _stored_values(config_response) is not None:
+                logger.info("Configuration values confirmed by the PUT response; skipping GET")
+            else:
+                try:
+                    get_response = get_configuration_api_call(config_api)
+                    if get_response:
+                        logger.info("Configuration GET call completed successfully")
+                    else:
+                        logger.info("Configuration GET call returned no data")
+                except Exception as get_error:
+                    logger.warning("Configuration GET call failed: %s", get_error)
             
         except Exception as e:
-            print(f"Configuration API call failed (continuing with workflow): {e}")
+            logger.warning("Configuration API call failed (continuing with workflow): %s", e)
             # Continue with the workflow even if Configuration API fails
 
+        try:
+            # Review needs the solution template version started in step 2
+            solution_template_version_result = solution_template_version_poller.result()
+            logger.info("Solution template version created successfully: %s", solution_template_version_result)
+
+            # Extract the solution template version ID from the response properties;
+            # SDK models are also mappings keyed by the REST (camelCase) names
+            properties = solution_template_version_result.properties
+            solution_template_version_id = getattr(properties, 'solutionTemplateVersionId', None)
+            if solution_template_version_id is None and isinstance(properties, Mapping):
+                solution_template_version_id = properties.get('solutionTemplateVersionId')
+
+        except Exception as e:
+            logger.error("An error occurred during solution template version creation: %s", e)
+            return
+
         # Review target using the extracted solution template version ID
-        print("=" * 50)
-        print("STEP 4: Review Target Deployment")
-        print("=" * 50)
-        print(f"Using solution template version ID: {solution_template_version_id}")
+        logger.info(BANNER50)
+        logger.info("STEP 4: Review Target Deployment")
+        logger.info(BANNER50)
+        logger.info("Using solution template version ID: %s", solution_template_version_id)
 
         solution_version_id = review_target(
             workload_client,
             resource_group_name,
-            target.name,
+            target_name,
             solution_template_version_id
         )
 
-        print("=" * 50)
-        print("STEP 5: Publish and Install Solution")
-        print("=" * 50)
-        print("The workflow has completed the following steps:")
-        print("✓ Context management with capabilities")
-        print("✓ Schema creation")
-        print("✓ Solution template creation")
-        print("✓ Target creation")
-        print("✓ Configuration API calls")
-        print("✓ Target review")
-        print()
-        print("TARGET INFORMATION:")
-        print(f"  Name: {target.name}")
-        print(f"  Resource Group: {resource_group_name}")
-        print(f"  Capabilities: {capabilities}")
-        print()
-        print("CONFIGURATION COMPLETED:")
-        print(f"  Config Name: {target.name}Config")
-        print(f"  Solution Name: sdkexamples-solution1")
-        print()
-        print("Proceeding with publish and install operations...")
+        logger.info(BANNER50)
+        logger.info("STEP 5: Publish and Install Solution")
+        logger.info(BANNER50)
+        logger.info("The workflow has completed the following steps:")
+        logger.info("✓ Context management with capabilities")
+        logger.info("✓ Schema creation")
+        logger.info("✓ Solution template creation")
+        logger.info("✓ Target creation")
+        logger.info("✓ Configuration API calls")
+        logger.info("✓ Target review")
+        logger.info("")
+        logger.info("TARGET INFORMATION:")
+        logger.info("  Name: %s", target_name)
+        logger.info("  Resource Group: %s", resource_group_name)
+        logger.info("  Capabilities: %s", capabilities)
+        logger.info("")
+        logger.info("CONFIGURATION COMPLETED:")
+        logger.info("  Config Name: %s", config_name)
+        logger.info("  Solution Name: sdkexamples-solution1")
+        logger.info("")
+        logger.info("Proceeding with publish and install operations...")
 
         # Publish target
         publish_result = publish_target(
             workload_client,
             resource_group_name,
-            target.name,
+            target_name,
             solution_version_id
         )
 
@@ -987,15 +1330,23 @@ def main():
         install_result = install_target(
             workload_client,
             resource_group_name,
-            target.name,
+            target_name,
             solution_version_id
         )
 
 
     except HttpResponseError as e:
-        print(f"An HTTP error occurred: {e.message}")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.error("An HTTP error occurred: %s", e.message)
+    except Exception:
+        # The one place a traceback is rendered; helpers let errors propagate here
+        logger.exception("An unexpected error occurred")
 
 if __name__ == "__main__":
+    # Plain messages on stdout, matching the output the script produced with print().
+    # The root logger stays at WARNING so the SDK, azure-identity and urllib3 only report
+    # problems; LOG_LEVEL=DEBUG shows this script's diagnostic detail skipped by default,
+    # and names logging doesn't know fall back to INFO.
+    logging.basicConfig(format="%(message)s", handlers=[logging.StreamHandler(sys.stdout)])
+    log_level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.setLevel(log_level if isinstance(log_level, int) else logging.INFO)
     main()